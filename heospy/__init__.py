@@ -10,15 +10,32 @@ http://rn.dmglobal.com/euheos/HEOS_CLI_ProtocolSpecification.pdf
 
 import json
 import os
-import telnetlib
-import re
+import queue
+import select
+import shutil
+import socket
+import struct
 import logging
 import argparse
-import six
+import errno
+import asyncio
 import sys
+import tempfile
+import threading
 import time
-from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from urllib.parse import urlencode, urlparse
+
+_log = logging.getLogger(__name__)
+
+# orjson is optional, but parses and serializes considerably faster than the
+# standard library
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Simple Service Discovery Protocol (SSDP),
 # https://gist.github.com/dankrause/6000248, should be right next to this file.
@@ -27,26 +44,126 @@ try:
 except ImportError: # when run locally, relative import does not work
     import ssdp
 
-# determine a default path for the config file
-DEFAULT_CONFIG_PATH = "."
-for location in os.path.expanduser("~/.heospy"), os.environ.get("HEOSPY_CONF"):
-    if location is None:
-        continue
-    try:
-        testname = os.path.join(location,"config.json")
-        if os.path.exists(testname):
-            DEFAULT_CONFIG_PATH = location
-            break
-    except IOError:
-        pass
+@lru_cache(None)
+def _default_config_path():
+    """Determine the default path for the config file, on first use only."""
+    for location in os.path.expanduser("~/.heospy"), os.environ.get("HEOSPY_CONF"):
+        if location is None:
+            continue
+        try:
+            testname = os.path.join(location,"config.json")
+            if os.path.exists(testname):
+                return location
+        except IOError:
+            pass
+    return "."
+
+def __getattr__(name):
+    # DEFAULT_CONFIG_PATH used to be determined at import time
+    if name == "DEFAULT_CONFIG_PATH":
+        return _default_config_path()
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
 
 
+# the TCP port of the HEOS CLI
+HEOS_PORT = 1255
 TIMEOUT = 15
+# connecting to a candidate during discovery should fail fast, a dead device
+# on the LAN must not stall the whole discovery
+CONNECT_TIMEOUT = 2
+# HEOS players answer an M-SEARCH with MX=1 within a second
+SSDP_TIMEOUT = 1.5
+# SSDP responses are remembered for repeated discoveries in the same process
+SSDP_CACHE_TTL = 60
+# the time of the last successful connection is stored in the config file, but
+# only refreshed every hour to avoid writing it on every call. An entry younger
+# than a day is trusted after a transient failure instead of rediscovering.
+LAST_SEEN_REFRESH = 3600
+LAST_SEEN_MAX_AGE = 24 * 3600
+# error id of HEOS for commands that need a signed in user
+EID_NOT_SIGNED_IN = "8"
+
+def _json_loads(data):
+    """Parse JSON from a string or bytes, with orjson if available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _json_dumpb(obj, indent=False):
+    """Serialize `obj` to UTF-8 encoded JSON, with orjson if available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode("utf-8")
+
+def _json_dumps(obj, indent=False):
+    """Serialize `obj` to a JSON string, with orjson if available."""
+    if orjson is not None:
+        return _json_dumpb(obj, indent).decode("utf-8")
+    return json.dumps(obj, indent=2 if indent else None)
+
+def _print_json(obj):
+    """Print `obj` as indented JSON on stdout."""
+    out = getattr(sys.stdout, "buffer", None)
+    if out is None: # e.g. stdout is replaced by a StringIO
+        print(_json_dumps(obj, indent=True))
+        return
+    sys.stdout.flush()
+    out.write(_json_dumpb(obj, indent=True) + b"\n")
+    out.flush()
+
+def _heos_quote(value, safe="", encoding=None, errors=None):
+    """Escape the characters that HEOS reserves in command arguments.
+
+    Used as `quote_via` for `urllib.parse.urlencode`. Only '%', '&' and '='
+    are encoded, as required by the specification, so that e.g. URLs or
+    comma-separated player ids are passed on unchanged.
+    """
+    if isinstance(value, bytes):
+        value = value.decode(encoding or "utf-8", errors or "strict")
+    return value.replace("%", "%25").replace("&", "%26").replace("=", "%3D")
+
+def _heos_connect(host, connect_timeout=TIMEOUT):
+    """Open a connection to the HEOS CLI port of `host`.
+
+    The HEOS CLI is a line based JSON protocol over TCP, it doesn't use any
+    telnet option negotiation.
+    """
+    sock = socket.create_connection((host, HEOS_PORT), timeout=connect_timeout)
+    sock.settimeout(TIMEOUT)
+    # HEOS commands are tiny request/response exchanges, don't let Nagle's
+    # algorithm delay them, and notice when an idle connection went away
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    return sock
+
+# the id that is added by default to the commands of a namespace, "browse/play*"
+# commands get a pid as well
+_DEFAULT_ID_KIND = { "group" : "gid", "player" : "pid" }
+
+# custom arguments with player or group names, and the id they are translated to
+_NAME_KEYS = { "pname" : ("pid", "players"), "gname" : ("gid", "groups") }
+
+_ssdp_cache = {} # location -> (time seen, SSDP response)
+
+def _cached_responses(service):
+    """Return the SSDP responses for `service` seen within the last
+    `SSDP_CACHE_TTL` seconds."""
+    now = time.monotonic()
+    return [response for seen, response in _ssdp_cache.values()
+            if now - seen < SSDP_CACHE_TTL and response.st == service]
+
+def _discover(service):
+    """Search for `service` with SSDP and yield the responses as they arrive."""
+    for response in ssdp.iter_discover(service, timeout=SSDP_TIMEOUT, mx=1):
+        _ssdp_cache[response.location] = (time.monotonic(), response)
+        yield response
 
 class HeosPlayerConfigException(Exception):
     pass
 class HeosPlayerGeneralException(Exception):
     pass
+class HeosPlayerConnectionException(HeosPlayerGeneralException):
+    pass
 
 class HeosPlayer(object):
     """Representation of an HEOS player with a specific player id.
@@ -62,21 +179,31 @@ This needs a JSON config file with a minimal content:
 """
 
     URN_SCHEMA = "urn:schemas-denon-com:device:ACT-Denon:1"
-    
-    def __init__(self, rediscover = False,
-                 config_file = os.path.join(DEFAULT_CONFIG_PATH, 'config.json')):
+
+    __slots__ = ('heosurl', 'host', 'pid', 'main_player_name', 'user', 'names',
+                 'groups', '_config', '_config_fingerprint', '_config_file', '_sock',
+                 '_rfile', '_lock', '_pid_suffix', '_gid_suffix', '_signed_in_user')
+
+    def __init__(self, rediscover = False, config_file = None):
         """Initialize HEOS player."""
-        self.heosurl = 'heos://'
+        config_file = config_file or os.path.join(_default_config_path(), 'config.json')
+        self.heosurl = b'heos://'
+        self.user = None
+        # serializes the requests of several threads on our connection
+        self._lock = threading.Lock()
 
         try:
-            with open(config_file) as json_data_file:
-                self._config = json.load(json_data_file)
+            with open(config_file, "rb") as json_data_file:
+                self._config = _json_loads(json_data_file.read())
         except IOError:
             error_msg = "cannot read your config file '{}'".format(config_file)
-            logging.error(error_msg)
+            _log.error(error_msg)
             raise HeosPlayerConfigException(error_msg)
         
-        logging.debug("use config file '{}'".format(config_file))
+        _log.debug("use config file '%s'", config_file)
+        # the compact serialization of the config as it is on disk, which is
+        # much cheaper to compute than the indented one that we write
+        self._config_fingerprint = _json_dumpb(self._config)
         
         self.host = self._config.get("host")
         self.pid = self._config.get("pid")
@@ -86,53 +213,45 @@ This needs a JSON config file with a minimal content:
         self.names["players"] = self._config.get("players", {})
         self.names["groups"] = self._config.get("groups", {})
         self.groups = None
+        # the user that signed in at the HEOS system before, trust it unless
+        # we rediscover the player; if HEOS signed us out meanwhile, `cmd`
+        # notices and signs in again
+        self._signed_in_user = None if rediscover else self._config.get("signed_in_user")
         
         if self.main_player_name is None:
-            logging.warn("No main player name given.")
+            _log.warning("No main player name given.")
             raise HeosPlayerGeneralException("No main player name given.")
         
         # if host and pid is not known, detect the first HEOS device.
         if rediscover or (not self.host or not self.pid):
-            logging.info(u"Starting to discover your HEOS player '{}' in your local network".format(self.main_player_name))
-            ssdp_list = ssdp.discover(self.URN_SCHEMA)
-            logging.debug("found {} possible hosts: {}".format(len(ssdp_list), ssdp_list))
-            self.telnet = None
-            for response in ssdp_list:
-                if response.st == self.URN_SCHEMA:
-                    try:
-                        self.host = re.match(r"http:..([^\:]+):", response.location).group(1)
-                        logging.debug("Testing host '{}'".format(self.host))                    
-                        self.telnet = telnetlib.Telnet(self.host, 1255)
-                        logging.debug("Telnet '{}'".format(self.telnet))                    
-                        self.pid = self._get_player(self.main_player_name)
-                        logging.debug("pid '{}'".format(self.pid))                                            
-                        if self.pid:
-                            self.main_player_name = self._config.get("player_name", self._config.get("main_player_name"))
-                            logging.info(u"Found main player '{}' in your local network".format(self.main_player_name))
-                            break
-                    except Exception as e:
-                        logging.error(e)
-                        pass
-            if self.telnet == None:
+            _log.info(u"Starting to discover your HEOS player '%s' in your local network", self.main_player_name)
+            found = self._discover_player()
+            if found is None:
                 msg = "couldn't discover any HEOS player with Simple Service Discovery Protocol (SSDP)."
-                logging.error(msg)
+                _log.error(msg)
                 raise HeosPlayerGeneralException(msg)
+            self.host, self.pid, self._sock, self._rfile = found
+            if self.pid:
+                _log.info(u"Found main player '%s' in your local network", self.main_player_name)
 
             self._update_groups_players()
             
         else:
-            logging.info(u"My cache says your HEOS player '{}' is at {}".format(self.main_player_name,
-                                                                                self.host))
+            _log.info(u"My cache says your HEOS player '%s' is at %s", self.main_player_name, self.host)
             try:
-                self.telnet = telnetlib.Telnet(self.host, 1255, timeout=TIMEOUT)
+                self._connect(self.host)
             except Exception as e:
-                raise HeosPlayerGeneralException("telnet failed")
+                raise HeosPlayerConnectionException("cannot connect to {}: {}".format(self.host, e))
+
+        # the default player id is appended to most commands, encode it once
+        self._pid_suffix = "?pid={}".format(self.pid).encode('ascii')
+        self._gid_suffix = "?gid={}".format(self.pid).encode('ascii')
 
         # check if we've found what we were looking for
         if self.host is None:
-            logging.error("No HEOS player found in your local network")
+            _log.error("No HEOS player found in your local network")
         elif self.pid is None:
-            logging.error(u"No player with name '{}' found for being a main player!".format(self.main_player_name))
+            _log.error(u"No player with name '%s' found for being a main player!", self.main_player_name)
         else:
             # get user and password
             if self.login(user=self._config.get("user"),
@@ -141,102 +260,345 @@ This needs a JSON config file with a minimal content:
 
                 
         # save config
-        if (rediscover or self._config.get("pid") is None) and self.host and self.pid:
-                
-            logging.info("Save host and pid in {}".format(self._config_file))
-            self._config["pid"] = self.pid
-            self._config["host"] = self.host
-            with open(os.path.join(self._config_file), "w") as json_data_file:
-                json.dump(self._config, json_data_file, indent=2)             
-                
+        if self.host and self.pid:
+            changed = False
+            if rediscover or self._config.get("pid") is None:
+                self._config["pid"] = self.pid
+                self._config["host"] = self.host
+                changed = True
+            if self._update_sign_in_config():
+                changed = True
+            if time.time() - self._config.get("last_seen", 0) > LAST_SEEN_REFRESH:
+                self._config["last_seen"] = int(time.time())
+                changed = True
+            if changed:
+                self._save_config()
+
+    def _update_sign_in_config(self):
+        """Store the signed in user in the config, return True if it changed."""
+        if self._signed_in_user == self._config.get("signed_in_user"):
+            return False
+        self._config["signed_in_user"] = self._signed_in_user
+        return True
+
+    def _connect(self, host, connect_timeout=TIMEOUT):
+        """Open the connection to the HEOS player at `host`."""
+        self._sock = _heos_connect(host, connect_timeout)
+        self._rfile = self._sock.makefile('rb', buffering=65536)
+
+    def _disconnect(self):
+        """Close the connection to the HEOS player."""
+        self._rfile.close()
+        self._sock.close()
+
+    def _save_config(self):
+        """Write the config file, unless its content would not change."""
+        fingerprint = _json_dumpb(self._config)
+        if fingerprint == self._config_fingerprint:
+            _log.debug("config in %s is up to date", self._config_file)
+            return
+        _log.info("Save config in %s", self._config_file)
+        # write a temporary file next to the real config first (not to a
+        # symlink), so that a crash never leaves a truncated config behind;
+        # each process gets its own temporary file
+        config_file = os.path.realpath(self._config_file)
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(config_file), prefix=".config-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as json_data_file:
+                json_data_file.write(_json_dumpb(self._config, indent=True))
+            # the config contains the password, keep its permissions
+            shutil.copymode(config_file, tmp_file)
+            os.replace(tmp_file, config_file)
+        except OSError as e:
+            # the config is only a cache here, don't fail the command
+            _log.warning("cannot save config in %s: %s", self._config_file, e)
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
+            return
+        self._config_fingerprint = fingerprint
+
     def __repr__(self):
-        return "<HeosPlayer({main_player_name}, {user}, {host}, {pid})>".format(**self.__dict__)
+        return "<HeosPlayer({}, {}, {}, {})>".format(self.main_player_name, self.user, self.host, self.pid)
 
-    def telnet_request(self, command, wait = True):
-        """Execute a `command` and return the response(s)."""
-        command = self.heosurl + command
-        logging.debug("telnet request {}".format(command))
-        self.telnet.write(command.encode('ascii') + b'\n')
-        response = b''
-        logging.debug("starting response loop")
+    def _responses(self, wait=True, rfile=None):
+        """Yield the JSON responses of the HEOS player as they arrive.
+
+        If `wait` is set, "command under process" messages are skipped
+        without parsing them. The responses are read from our connection,
+        unless another buffered reader `rfile` is given.
+        """
+        rfile = rfile or self._rfile
         while True:
-            response += self.telnet.read_some()
+            # HEOS terminates each JSON response with CRLF
             try:
-                response = json.loads(response.decode("utf-8"))
-                logging.debug("found valid JSON: {}".format(json.dumps(response)))
-                if not wait:
-                    logging.debug("I accept the first response: {}".format(response))
-                    break
-                # sometimes, I get a response with the message "under
-                # process". I might want to wait here
-                message = response.get("heos", {}).get("message", "")
-                if "command under process" not in message:
-                    logging.debug("I assume this is the final response: {}".format(response))
-                    break
-                logging.debug("Wait for the final response")
-                response = b'' # forget this message
-            except ValueError:
-                logging.debug("... unfinished response: {}".format(response))
-                # response is not a complete JSON object
-                pass
-            except TypeError:
-                logging.debug("... unfinished response: {}".format(response))                
-                # response is not a complete JSON object
-                pass
+                line = rfile.readline()
+            except socket.timeout:
+                raise HeosPlayerConnectionException("no response from HEOS player within {} seconds".format(TIMEOUT))
+            response = self._parse_line(line, wait)
+            if response is not None:
+                yield response
 
+    def _parse_line(self, line, wait=True):
+        """Parse a response `line`, return None if it should be skipped."""
+        if not line:
+            raise HeosPlayerConnectionException("connection closed by HEOS player")
+        if not line.strip():
+            return None
+        if wait and b'command under process' in line:
+            # sometimes, I get a response with the message "under
+            # process". I might want to wait here
+            _log.debug("Wait for the final response")
+            return None
+        try:
+            response = _json_loads(line)
+        except ValueError:
+            _log.error("cannot parse response: %s", line)
+            return None
+        if _log.isEnabledFor(logging.DEBUG):
+            _log.debug("found valid JSON: %s", _json_dumps(response))
+        return response
+
+    def _parse_message(self, response):
+        """Add the parsed message attribute of a `response`."""
         # try to parse the message attribute of the response, there might be
         # some useful information, especially if the payload attribute is
         # missing
-        if response.get("heos", {}).get("message"):
-            message_parsed_list = response.get("heos", {}).get("message").split("&")
-            logging.debug(message_parsed_list)
-            message_parsed = OrderedDict()
-            for item in message_parsed_list:
-                split_items = item.split("=")
-                if len(split_items) == 1:
-                    split_items.append(True)
-                message_parsed[split_items[0]] = split_items[1]
-            response["heos_message_parsed"] = message_parsed
-
-        logging.debug("found valid response: {}".format(json.dumps(response)))
+        message = response.get("heos", {}).get("message")
+        if message:
+            # bare flags like "signed_in" are set to True
+            response["heos_message_parsed"] = {
+                key: value if sep else True
+                for key, sep, value in (item.partition("=") for item in message.split("&"))}
+
+        if _log.isEnabledFor(logging.DEBUG):
+            _log.debug("found valid response: %s", _json_dumps(response))
         return response
 
+    def _frame(self, command):
+        """Return the line to send to the HEOS player for a `command`."""
+        if isinstance(command, str):
+            command = command.encode('utf-8')
+        return self.heosurl + command + b'\n'
+
+    def _check_connection(self):
+        """Raise `HeosPlayerConnectionException` if the HEOS player closed our
+        connection, e.g. while we were idle, instead of waiting for a response
+        that never arrives."""
+        if self._sock.fileno() == -1:
+            # e.g. a reconnect failed, the caller may try to connect again
+            raise HeosPlayerConnectionException("not connected to HEOS player {}".format(self.host))
+        try:
+            readable, _, _ = select.select([self._sock], [], [], 0)
+            closed = bool(readable) and not self._sock.recv(1, socket.MSG_PEEK)
+        except OSError as e:
+            raise HeosPlayerConnectionException("connection to HEOS player {} is broken: {}".format(self.host, e))
+        if closed:
+            raise HeosPlayerConnectionException("HEOS player {} closed the connection".format(self.host))
+
+    def telnet_request(self, command, wait = True):
+        """Execute a `command` (str or bytes) and return the response(s)."""
+        command = self._frame(command)
+        _log.debug("telnet request %s", command)
+        with self._lock:
+            self._check_connection()
+            self._sock.sendall(command)
+            _log.debug("starting response loop")
+            response = next(self._responses(wait))
+        _log.debug("I assume this is the final response: %s", response)
+        return self._parse_message(response)
+
+    def telnet_request_many(self, commands):
+        """Execute several `commands` at once and return their responses.
+
+        All commands are sent before the first response is read, so the
+        round trips to the HEOS player overlap. The responses are matched to
+        the commands by their `command` attribute.
+        """
+        frames = [self._frame(command) for command in commands]
+        expected = self._expected_commands(frames)
+        received = {}
+        _log.debug("telnet requests %s", commands)
+        with self._lock:
+            self._check_connection()
+            self._sock.sendall(b''.join(frames))
+            missing = len(frames)
+            for response in (self._responses() if missing else ()):
+                if self._receive(expected, received, response):
+                    missing -= 1
+                    if not missing:
+                        break
+        return [self._parse_message(received[name].pop(0)) for name in expected]
+
+    def _expected_commands(self, frames):
+        """Return the command names that HEOS reports in the responses to
+        `frames`."""
+        # e.g. b'heos://player/get_volume?pid=1\n' -> 'player/get_volume'
+        return [frame[len(self.heosurl):].split(b'?', 1)[0].strip().decode('utf-8')
+                for frame in frames]
+
+    def _receive(self, expected, received, response):
+        """Add `response` to the lists in `received` by command name if it
+        answers one of the `expected` commands, and return if it does."""
+        name = response.get("heos", {}).get("command")
+        if name not in expected:
+            _log.debug("ignore unexpected response: %s", response)
+            return False
+        received.setdefault(name, []).append(response)
+        return True
+
     def _update_groups_players(self):
         idx = { "groups" : "gid", "players" : "pid" }
         
         for aggregate in ["players", "groups"]:
             result = self.telnet_request("player/get_{}".format(aggregate)).get("payload")
             if result:
-                self.names[aggregate] = {}
-                logging.debug(result)
-                for this_item in result:
-                    self.names[aggregate][this_item["name"]] = this_item[ idx[aggregate] ]
-                    self._config[aggregate] = self.names[aggregate]
-                logging.info("In total, I found {} {} in your local network.".format(len(self.names[aggregate]), aggregate))
+                _log.debug("%s", result)
+                key = idx[aggregate]
+                self.names[aggregate] = {this_item["name"]: this_item[key] for this_item in result}
+                if len(self.names[aggregate]) < len(result):
+                    _log.warning("Some of your %s share a name, only the last one of them is used.", aggregate)
+                self._config[aggregate] = self.names[aggregate]
+                _log.info("In total, I found %s %s in your local network.", len(self.names[aggregate]), aggregate)
             else:
                 msg = "I couldn't find a list of {}.".format(aggregate)
                 if aggregate == "groups":
-                    logging.warn(msg)
+                    _log.warning(msg)
                 else:
-                    logging.error(msg)
+                    _log.error(msg)
                     raise HeosPlayerGeneralException(msg)
         
         return True
 
-    def _get_player(self, name):
-        response = self.telnet_request("player/get_players")
+    def _probe(self, response):
+        """Look for our main player on the device of an SSDP `response`.
+
+        Return (host, pid, socket, reader) of the connection to the device,
+        where pid is None if the main player is unknown there, or None if the
+        device cannot be reached.
+        """
+        host = urlparse(response.location).hostname
+        _log.debug("Testing host '%s'", host)
+        try:
+            sock = _heos_connect(host, CONNECT_TIMEOUT)
+        except OSError as e:
+            _log.error(e)
+            return None
+        rfile = sock.makefile('rb', buffering=65536)
+        try:
+            sock.sendall(self._frame("player/get_players"))
+            pid = self._find_player(next(self._responses(rfile=rfile)), self.main_player_name)
+        except Exception as e:
+            _log.error(e)
+            rfile.close()
+            sock.close()
+            return None
+        _log.debug("pid of '%s' on '%s' is '%s'", self.main_player_name, host, pid)
+        return host, pid, sock, rfile
+
+    def _discover_player(self):
+        """Discover the device that knows our main player with SSDP.
+
+        Return the result of `_probe` for the first device that knows our
+        main player, or for any reachable device if none does, or None.
+        """
+        # try the devices of a recent discovery first, a new search is only
+        # needed if none of them knows our main player anymore
+        cached = _cached_responses(self.URN_SCHEMA)
+        if cached:
+            found = self._probe_all(iter(cached))
+            if found and found[1]:
+                return found
+            if found:
+                _, _, sock, rfile = found
+                rfile.close()
+                sock.close()
+        return self._probe_all(response for response in _discover(self.URN_SCHEMA)
+                               if response.st == self.URN_SCHEMA)
+
+    def _probe_all(self, candidates):
+        """Probe the SSDP responses of `candidates` in parallel.
+
+        The responses are received in a thread of their own and each device
+        is probed as soon as it answers, so that discovery ends as soon as a
+        probe finds our main player.
+        """
+        executor = ThreadPoolExecutor(max_workers=8)
+        # probe results as they finish, and `done` once all candidates arrived
+        results = queue.Queue()
+        done = object()
+        futures = []
+        stop = threading.Event()
+        lock = threading.Lock()
+
+        def receive():
+            try:
+                for response in candidates:
+                    _log.debug("found possible host: %s", response)
+                    with lock:
+                        if stop.is_set():
+                            break
+                        future = executor.submit(self._probe, response)
+                        futures.append(future)
+                    future.add_done_callback(lambda future: results.put(None if future.cancelled() else future.result()))
+            except Exception as e:
+                _log.error(e)
+            finally:
+                results.put(done)
+
+        threading.Thread(target=receive, daemon=True).start()
+        found = reachable = None
+        received_all = False
+        finished = 0
+        try:
+            while not received_all or finished < len(futures):
+                result = results.get()
+                if result is done:
+                    received_all = True
+                    continue
+                finished += 1
+                if result and result[1]:
+                    found = result
+                    break
+                reachable = reachable or result
+            found = found or reachable
+        finally:
+            with lock:
+                stop.set()
+            # don't wait for the probes that are still running, but close
+            # the connections that we don't use
+            def close_unused(future):
+                if not future.cancelled() and future.result() not in (None, found):
+                    _, _, sock, rfile = future.result()
+                    rfile.close()
+                    sock.close()
+            for future in futures:
+                future.cancel()
+                future.add_done_callback(close_unused)
+            executor.shutdown(wait=False)
+        return found
+
+    def _find_player(self, response, name):
+        """Return the pid of player `name` in a get_players `response`."""
         if response.get("payload") is None:
             return None
         for player in response.get("payload"):
-            logging.debug(u"found '{}', looking for '{}'".format(player.get("name"), name))
+            _log.debug(u"found '%s', looking for '%s'", player.get("name"), name)
             if player.get("name") == name:
                 return player.get("pid")
         return None
 
+    def _get_player(self, name):
+        return self._find_player(self.telnet_request("player/get_players"), name)
+
     def login(self, user = None , pw = None):
         if user is None or pw is None:
-            logging.info("No user or password found in config, skip login step")
+            _log.info("No user or password found in config, skip login step")
             return {}
+        if self._signed_in_user == user:
+            _log.info("Already signed in as %s (cached)", user)
+            return True
         # fist check if we're already signed in: get the currently signed in
         # user from the system
         signed_in_message = self.telnet_request("system/check_account").get("heos",{}).get("message", "")
@@ -246,89 +608,324 @@ This needs a JSON config file with a minimal content:
             # if signed in, we should also have the same user here.
             signed_in_user = signed_in_message.split("&")[1][3:]
             if signed_in_user==user:
-                logging.info("Already signed in as {}".format(signed_in_user))
+                _log.info("Already signed in as %s", signed_in_user)
+                self._signed_in_user = user
                 return True
             else:
-                logging.info("user '{}' is different from '{}'".format(signed_in_user, user))
+                _log.info("user '%s' is different from '%s'", signed_in_user, user)
 
         # At this point, it seems as if we have to really sign in, which takes
         # a second or two...
-        logging.info("Need to sign in as {} to have access to favorites etc.".format(user))
-        return self.telnet_request("system/sign_in?un={}&pw={}".format(user, pw))
+        _log.info("Need to sign in as %s to have access to favorites etc.", user)
+        response = self.telnet_request("system/sign_in?" + urlencode({"un": user, "pw": pw}, quote_via=_heos_quote))
+        if response.get("heos", {}).get("result") == "success":
+            self._signed_in_user = user
+        return response
     
 
     def cmd(self, cmd, args):
         """ issue a command for our player """
 
-        # parse args and check if there is a gid or pid exlicitly given
-        args_concatenated = ""
-        pid_explicitly_given = False
-        gid_explicitly_given = False
-
-        for (key,value) in six.iteritems(args):
-            if key == "pname" or key == "gname" : # these are custom command, working only with this package
-
-                idx = { "gname" : "gid", "pname" : "pid" }
-                idx2 = { "gid" : "groups", "pid" : "players" }
-
+        # parse args and translate player or group names to ids
+        resolved_args = {}
+        for (key,value) in args.items():
+            if key in _NAME_KEYS: # these are custom command, working only with this package
                 # reassign key
-                key = idx[key]
+                key, aggregate = _NAME_KEYS[key]
+                names = self.names[aggregate]
+                value = value.decode("utf-8") if isinstance(value, bytes) else value
                 # analyse the value, which could be one or many speaker names
-                named_values = value.split(u",")
                 value_list = []
-                for named_value in named_values:
-                    new_value = self.names[ idx2[key] ].get(named_value, False)
-                    if new_value is False:
-                        raise HeosPlayerGeneralException("Name '{}' is not known. ({}). Try to rediscover (use flag '-r').".format(value, self.names[idx2[key]].keys()))
-                    logging.debug("translated name '{}' to {}={}".format(value, idx, new_value))
+                for named_value in value.split(u","):
+                    new_value = names.get(named_value)
+                    if new_value is None:
+                        raise HeosPlayerGeneralException("Name '{}' is not known. ({}). Try to rediscover (use flag '-r').".format(value, names.keys()))
+                    _log.debug("translated name '%s' to %s=%s", named_value, key, new_value)
                     value_list.append(str(new_value))
                 value = ",".join(value_list)
 
-            args_concatenated += "&{}={}".format(key, value)
+            resolved_args[key] = value
 
-            logging.info("cmd : {}, args {}".format(cmd, args_concatenated))
+        args_concatenated = ""
+        if resolved_args:
+            args_concatenated = "&" + urlencode(resolved_args, quote_via=_heos_quote)
+            _log.info("cmd : %s, args %s", cmd, args_concatenated)
 
-            if key == "pid":
-                pid_explicitly_given = True
-            if key == "gid":
-                gid_explicitly_given = True
-                
+        # if this is a command where a gid or a pid is needed, check if we
+        # could use the default pid from the config file, unless a gid or pid
+        # is explicitly given
+        namespace, _, name = cmd.partition("/")
+        kind = _DEFAULT_ID_KIND.get(namespace)
+        if namespace == "browse" and name.startswith("play"):
+            kind = "pid"
+        if kind is None or kind in resolved_args:
+            s = cmd.encode('ascii') + b'?dummy=1' # use dummy so that
+                                                  # args_concatenated is correctly attached
+        elif self.pid is None:
+            _log.warning("No default player is defined.")
+            s = cmd.encode('ascii') + b'?dummy=1'
+        elif kind == "gid":
+            _log.info("I assume default group with id %s", self.pid)
+            s = cmd.encode('ascii') + self._gid_suffix
+        else:
+            _log.info("I assume default player with id %s", self.pid)
+            s = cmd.encode('ascii') + self._pid_suffix
 
+        s += args_concatenated.encode('utf-8')
+        response = self.telnet_request(s)
+        if self._signed_in_user and response.get("heos_message_parsed", {}).get("eid") == EID_NOT_SIGNED_IN:
+            # the HEOS system signed us out since we checked, e.g. after a
+            # reset, so forget the cached sign in and sign in again
+            _log.warning("Not signed in as %s anymore", self._signed_in_user)
+            self._signed_in_user = None
+            self.login(user=self._config.get("user"), pw=self._config.get("pw"))
+            if self._signed_in_user:
+                response = self.telnet_request(s)
+            if self._update_sign_in_config():
+                self._save_config()
+        return response
 
-        if self.pid is None and ("groups/" in cmd or "group/" in cmd or "browse/" in cmd):
-            logging.warn("No default player is defined.")
-        else:
-            # if this is a command where a gid or a pid is needed, check if we
-            # could use the default pid from the config file
-            if ("group/" in cmd) and not gid_explicitly_given:
-                logging.info("I assume default group with id {0}".format(self.pid))
-                s = '{0}?gid={1}'.format(cmd, self.pid)
-            elif ("player/" in cmd or "players" in cmd) and not pid_explicitly_given:
-                logging.info("I assume default player with id {0}".format(self.pid))
-                s = '{0}?pid={1}'.format(cmd, self.pid)
-            elif ("browse/play" in cmd) and not pid_explicitly_given:
-                logging.info("I assume default player with id {0}".format(self.pid))
-                s = '{0}?pid={1}'.format(cmd, self.pid)
-            else:
-                s = '{0}?dummy=1'.format(cmd) # use dummy so that
-                                              # args_concatenated is correctly attached
+    async def _telnet_request_many_async(self, commands):
+        """Like `telnet_request_many`, but on a new, short-lived connection."""
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, HEOS_PORT), TIMEOUT)
+        try:
+            frames = [self._frame(command) for command in commands]
+            expected = self._expected_commands(frames)
+            received = {}
+            writer.write(b''.join(frames))
+            await writer.drain()
+            missing = len(frames)
+            while missing:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), TIMEOUT)
+                except asyncio.TimeoutError:
+                    raise HeosPlayerConnectionException("no response from HEOS player within {} seconds".format(TIMEOUT))
+                response = self._parse_line(line)
+                if response is not None and self._receive(expected, received, response):
+                    missing -= 1
+            return [self._parse_message(received[name].pop(0)) for name in expected]
+        finally:
+            writer.close()
+
+    async def _status(self, general_commands, player_commands):
+        # the general commands use a second connection, while the player
+        # commands run concurrently on our own connection
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(self._telnet_request_many_async(general_commands),
+                                    loop.run_in_executor(None, self.telnet_request_many, player_commands))
 
-        return self.telnet_request(s + args_concatenated)
-    
     def status(self):
-        s = { "general" : [], "player" : [] }
-        s["general"].append(self.telnet_request("system/heart_beat"))
-        s["general"].append(self.telnet_request("system/check_account"))
-        s["general"].append(self.telnet_request("browse/get_music_sources"))
-        s["general"].append(self.telnet_request("player/get_players"))
-        s["general"].append(self.telnet_request("group/get_groups"))
+        general_commands = [b"system/heart_beat",
+                            b"system/check_account",
+                            b"browse/get_music_sources",
+                            b"player/get_players",
+                            b"group/get_groups"]
+        player_commands = []
         if self.pid:
-            s["player"].append(self.telnet_request("player/get_play_state?pid={0}".format(self.pid)))
-            s["player"].append(self.telnet_request("player/get_player_info?pid={0}".format(self.pid)))
-            s["player"].append(self.telnet_request("player/get_volume?pid={0}".format(self.pid)))
-            s["player"].append(self.telnet_request("player/get_mute?pid={0}".format(self.pid)))
-            s["player"].append(self.telnet_request('player/get_now_playing_media?pid={0}'.format(self.pid)))
-        return s
+            player_commands = [command + self._pid_suffix
+                               for command in [b"player/get_play_state",
+                                               b"player/get_player_info",
+                                               b"player/get_volume",
+                                               b"player/get_mute",
+                                               b"player/get_now_playing_media"]]
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            general, player = asyncio.run(self._status(general_commands, player_commands))
+        else:
+            # we are called from a running event loop, which can't be nested
+            general = self.telnet_request_many(general_commands)
+            player = self.telnet_request_many(player_commands)
+        return { "general" : general, "player" : player }
+
+def _recently_seen(config_file):
+    """Check if the cached HEOS player of `config_file` is worth a retry.
+
+    This is the case if it was seen within `LAST_SEEN_MAX_AGE` seconds and it
+    still accepts connections.
+    """
+    try:
+        with open(config_file, "rb") as json_data_file:
+            config = _json_loads(json_data_file.read())
+    except (IOError, ValueError):
+        return False
+    host = config.get("host")
+    if not host or time.time() - config.get("last_seen", 0) > LAST_SEEN_MAX_AGE:
+        return False
+    try:
+        socket.create_connection((host, HEOS_PORT), timeout=0.5).close()
+    except OSError:
+        return False
+    return True
+
+def _daemon_address():
+    """Return the address of the socket served by `heos_player --serve`."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "heospy.sock")
+    if sys.platform.startswith("linux"):
+        # an abstract unix socket doesn't need to be cleaned up
+        return "\0heospy-{}".format(os.getuid())
+    return os.path.join(tempfile.gettempdir(), "heospy-{}.sock".format(os.getuid()))
+
+class HeosDaemonClient(object):
+    """Forward commands to a running `heos_player --serve`.
+
+It offers the same `cmd` and `status` methods as `HeosPlayer`, but reuses the
+connection to the HEOS player kept open by the daemon.
+
+"""
+
+    host = "the heos_player daemon"
+
+    def __init__(self, config_file):
+        """Connect to the daemon, raise `OSError` if none is running.
+
+        Raise `HeosPlayerConfigException` if the daemon serves another config
+        file than `config_file`.
+        """
+        if not hasattr(socket, "AF_UNIX"):
+            raise OSError("unix sockets are not supported on this platform")
+        address = _daemon_address()
+        # don't send our commands to a socket that another user created
+        if not address.startswith("\0") and os.stat(address).st_uid != os.getuid():
+            raise PermissionError("{} belongs to another user".format(address))
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._sock.connect(address)
+            uid = _peer_uid(self._sock)
+            if uid is not None and uid != os.getuid():
+                raise PermissionError("the heos_player daemon at {} runs as user {}".format(address.lstrip("\0"), uid))
+        except OSError:
+            self._sock.close()
+            raise
+        self._file = self._sock.makefile("rwb")
+        config_file = os.path.realpath(config_file)
+        daemon_config_file = self._request({"config": config_file})
+        if daemon_config_file != config_file:
+            self.close()
+            raise HeosPlayerConfigException("the heos_player daemon serves config file '{}'".format(daemon_config_file))
+
+    def close(self):
+        """Close the connection to the daemon."""
+        self._file.close()
+        self._sock.close()
+
+    def __repr__(self):
+        return "<HeosDaemonClient({})>".format(_daemon_address().lstrip("\0"))
+
+    def _request(self, request):
+        self._file.write(_json_dumpb(request) + b"\n")
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise HeosPlayerGeneralException("the heos_player daemon closed the connection")
+        response = _json_loads(line)
+        if "error" in response:
+            raise HeosPlayerGeneralException(response["error"])
+        return response["result"]
+
+    def cmd(self, cmd, args):
+        """ issue a command for the player of the daemon """
+        return self._request({"cmd": cmd, "args": args})
+
+    def status(self):
+        return self._request({"status": True})
+
+def _serve_request(player, request):
+    if "config" in request:
+        # a new client checks that we serve its config file
+        return os.path.realpath(player._config_file)
+    if request.get("status"):
+        return player.status()
+    return player.cmd(request["cmd"], request.get("args", {}))
+
+def _peer_uid(conn):
+    """Return the user id of the process at the other end of unix socket
+    `conn`, or None if the platform cannot tell."""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    _, uid, _ = struct.unpack("3i", creds)
+    return uid
+
+def _serve_connection(player, lock, conn):
+    with conn, conn.makefile("rwb") as conn_file:
+        for line in conn_file:
+            try:
+                request = _json_loads(line)
+                _log.info("Daemon got request %s", request)
+                with lock:
+                    try:
+                        result = _serve_request(player, request)
+                    except (OSError, HeosPlayerConnectionException) as e:
+                        # the connection to the HEOS player may have gone
+                        # stale while idle, reconnect once and try again
+                        _log.warning("Request failed (%s), reconnect to %s", e, player.host)
+                        player._disconnect()
+                        player._connect(player.host)
+                        result = _serve_request(player, request)
+                response = {"result": result}
+            except Exception as e:
+                _log.error(e)
+                response = {"error": str(e)}
+            conn_file.write(_json_dumpb(response) + b"\n")
+            conn_file.flush()
+
+def serve(player):
+    """Serve commands of other `heos_player` calls with `player`."""
+    address = _daemon_address()
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    if not address.startswith("\0") and os.path.exists(address):
+        if os.stat(address).st_uid != os.getuid():
+            raise HeosPlayerGeneralException("a heos_player daemon of another user is already serving {}".format(address))
+        # remove the socket of a daemon that is gone, but don't steal the
+        # socket of a running one
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(address)
+            except OSError:
+                os.unlink(address)
+            else:
+                raise HeosPlayerGeneralException("a heos_player daemon is already serving {}".format(address))
+    try:
+        server.bind(address)
+    except OSError as e:
+        server.close()
+        if e.errno == errno.EADDRINUSE:
+            raise HeosPlayerGeneralException("a heos_player daemon is already serving {}".format(address.lstrip("\0")))
+        raise
+    try:
+        if not address.startswith("\0"):
+            # only our user may send commands, it's our HEOS account
+            os.chmod(address, 0o600)
+        server.listen()
+        # several clients may be connected, but they share one HEOS connection
+        lock = threading.Lock()
+        _log.info("Waiting for commands on %s", address.lstrip("\0"))
+        while True:
+            conn, _ = server.accept()
+            # an abstract socket has no permissions, check the user instead
+            uid = _peer_uid(conn)
+            if uid is not None and uid != os.getuid():
+                _log.warning("Reject connection of user %s", uid)
+                conn.close()
+                continue
+            threading.Thread(target=_serve_connection, args=(player, lock, conn), daemon=True).start()
+    finally:
+        server.close()
+        if not address.startswith("\0"):
+            os.unlink(address)
+
+def _setup_logging(level):
+    """Log to stderr with `level`, unless logging is configured already."""
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+    root.addHandler(handler)
+    root.setLevel(level)
 
 def parse_args():
     """Parse command line arguments."""
@@ -355,6 +952,10 @@ def parse_args():
     parser.add_argument("-p", "--param", action='append', 
                         type=lambda kv: kv.split("="), dest='param', metavar="param=value",
                         help="optional key-value pairs that needs to be accompanied to the command that is sent to the HEOS player.")
+    parser.add_argument("-d", "--serve", "--daemon", action='store_true', default=False,
+                        help="keep the connection to the HEOS player open and serve the commands of other heos_player calls", dest="serve")
+    parser.add_argument("--client", action='store_true', default=False,
+                        help="only forward the command to a running heos_player daemon, fail if there is none", dest="client")
     parser.add_argument("-c", "--config", dest="config", default="", metavar="filename",
                         help="config file (by default, the script looks for a config file called `config.json` in the current directory, then in $HOME/.heospy/, then in the path specified in $HEOSPY_CONF)")
     parser.add_argument("-lf", "--lockfile", dest="lockfile", default="", metavar="filename",
@@ -375,98 +976,139 @@ def main():
         Path(script_args.lockfile).touch()
 
     try: 
-        logging.basicConfig(format='%(asctime)s %(levelname)s %(message)s',
-                            level=getattr(logging, script_args.logLevel))
+        _setup_logging(getattr(logging, script_args.logLevel))
         
         if script_args.param:
             try:
-                heos_args = OrderedDict(script_args.param)
+                heos_args = dict(script_args.param)
             except ValueError:
-                logging.error("there are some errors in your '--param' arguments: '{}'".format(script_args.param))
+                _log.error("there are some errors in your '--param' arguments: '%s'", script_args.param)
                 sys.exit(0)
 
         # determine the config file
-        logging.debug("DEFAULT_CONFIG_PATH is '{}'".format(DEFAULT_CONFIG_PATH))
-        config_file  = os.path.join(DEFAULT_CONFIG_PATH, 'config.json')
         if script_args.config:
             config_file  = script_args.config
-            logging.debug("from --config, I got '{}'".format(config_file))
+            _log.debug("from --config, I got '%s'", config_file)
+        else:
+            _log.debug("default config path is '%s'", _default_config_path())
+            config_file  = os.path.join(_default_config_path(), 'config.json')
+
+        # use a running daemon, it already has a connection to the HEOS player
+        p = None
+        if not script_args.serve and not script_args.rediscover:
+            try:
+                p = HeosDaemonClient(config_file)
+                _log.debug("Forward commands to %s", p)
+            except PermissionError as e:
+                _log.warning("Ignore the heos_player daemon: %s", e)
+                if script_args.client:
+                    sys.exit(-1)
+            except OSError:
+                if script_args.client:
+                    _log.error("No heos_player daemon is running, start one with '--serve'")
+                    sys.exit(-1)
+                _log.debug("No heos_player daemon is running")
+            except HeosPlayerConfigException as e:
+                if script_args.client:
+                    _log.error("%s, not '%s'", e, config_file)
+                    sys.exit(-1)
+                _log.info("%s, connect directly", e)
 
         # initialize connection to HEOS player
-        try:
-            p = HeosPlayer(rediscover = script_args.rediscover, config_file=config_file)
-        except HeosPlayerConfigException:
-            logging.info("Try to find a valid config file and specify it with '--config'...")
-            sys.exit(-1)
-        except HeosPlayerGeneralException:
-            # if the connection failed, it might be because the cached IP for
-            # the HEOS player is not valid anymore. We check if we can rediscover
-            # the new IP of the HEOS player
-            if script_args.rediscover == False:
-                logging.info("First connection failed. Try to rediscover the HEOS players.")
-                p = HeosPlayer(rediscover = True, config_file=config_file)
-        except:
-            logging.error("Someting unexpected got wrong...")
-            raise
+        if p is None:
+            try:
+                p = HeosPlayer(rediscover = script_args.rediscover, config_file=config_file)
+            except HeosPlayerConfigException:
+                _log.info("Try to find a valid config file and specify it with '--config'...")
+                sys.exit(-1)
+            except (HeosPlayerGeneralException, OSError):
+                # if the connection failed, it might be because the cached IP for
+                # the HEOS player is not valid anymore. We check if we can rediscover
+                # the new IP of the HEOS player
+                if script_args.rediscover:
+                    raise
+                if _recently_seen(config_file):
+                    # the failure was probably transient, a discovery with
+                    # SSDP is not necessary
+                    _log.info("First connection failed, but the HEOS player still answers. Try again.")
+                    try:
+                        p = HeosPlayer(config_file=config_file)
+                    except (HeosPlayerGeneralException, OSError):
+                        pass
+                if p is None:
+                    _log.info("First connection failed. Try to rediscover the HEOS players.")
+                    p = HeosPlayer(rediscover = True, config_file=config_file)
+            except:
+                _log.error("Someting unexpected got wrong...")
+                raise
+
+        if script_args.serve:
+            serve(p)
 
         # check status or issue a command
         if script_args.status:
-            logging.info("Try to find some status info from {}".format(p.host))
-            print(json.dumps(p.status(), indent=2))
+            _log.info("Try to find some status info from %s", p.host)
+            _print_json(p.status())
         elif script_args.infile:
-            logging.debug("reading a list of commands from {}".format(script_args.infile))
-            all_lines = script_args.infile.read().splitlines()
-            # execute each cmd
-            all_results = []
+            _log.debug("reading a list of commands from %s", script_args.infile)
+            # execute each cmd and print its result right away, as an
+            # element of a JSON array
             fail = False
-            for line in all_lines:
-                if len(line) > 0 and line[0] == "#": continue # skip comments
-                # get elements separated by whitespaces
-                cmd_args = line.split()
-                if len(cmd_args) == 0: continue
-                # first element is the command, like "player/set_volume"
-                heos_cmd = cmd_args[0]
-                # check if we want to ignore a fail here
-                ignore_fail = False
-                if cmd_args[-1] == "--ignore-fail":
-                    ignore_fail = True
-                    cmd_args = cmd_args[0:-1]
-                if heos_cmd == "wait": # this is a special command
-                    try:
-                        secs = int(cmd_args[1])
-                    except IndexError:
-                        secs=1
+            first = True
+            sys.stdout.write("[")
+            try:
+                for line in script_args.infile:
+                    if len(line) > 0 and line[0] == "#": continue # skip comments
+                    # get elements separated by whitespaces
+                    cmd_args = line.split()
+                    if len(cmd_args) == 0: continue
+                    # first element is the command, like "player/set_volume"
+                    heos_cmd = cmd_args[0]
+                    # check if we want to ignore a fail here
+                    ignore_fail = False
+                    if cmd_args[-1] == "--ignore-fail":
+                        ignore_fail = True
+                        cmd_args = cmd_args[0:-1]
+                    if heos_cmd == "wait": # this is a special command
+                        try:
+                            secs = int(cmd_args[1])
+                        except IndexError:
+                            secs=1
                         time.sleep(secs)
-                        all_results.append({ "heospy" : { "sleep": "successful for {} secs".format(secs) } })
-                else:
-                    # other elements are parameters like "level=10" or "pid=387387",
-                    # collect them in a dictionary
-                    heos_args = OrderedDict([ kv.split("=") for kv in cmd_args[1:] ])
-                    # issue the actual command
-                    logging.info("Issue command '{}' with arguments {}".format(heos_cmd, json.dumps(heos_args)))
-                    result = p.cmd(heos_cmd, heos_args)
-                    all_results.append(result)
-                    if result.get("heos", {}).get("result", "") != "success" and not ignore_fail:
+                        result = { "heospy" : { "sleep": "successful for {} secs".format(secs) } }
+                    else:
+                        # other elements are parameters like "level=10" or "pid=387387",
+                        # collect them in a dictionary
+                        heos_args = dict([ kv.split("=") for kv in cmd_args[1:] ])
+                        # issue the actual command
+                        _log.info("Issue command '%s' with arguments %s", heos_cmd, heos_args)
+                        result = p.cmd(heos_cmd, heos_args)
+                    sys.stdout.write(("\n" if first else ",\n") + _json_dumps(result, indent=True))
+                    sys.stdout.flush()
+                    first = False
+                    if heos_cmd == "wait" or ignore_fail:
+                        continue
+                    if result.get("heos", {}).get("result", "") != "success":
                         fail = True
                         break
-                    
-            # print all results at the end
-            print(json.dumps(all_results, indent=2))
+            finally:
+                sys.stdout.write("\n]\n")
+                sys.stdout.flush()
 
             # if the last result was not a success, return with -1
             if fail:
                 sys.exit(-1)
-                
+
         elif heos_cmd:
-            logging.info("Issue command '{}' with arguments {}".format(heos_cmd, json.dumps(heos_args)))
+            _log.info("Issue command '%s' with arguments %s", heos_cmd, heos_args)
             result = p.cmd(heos_cmd, heos_args)
-            print(json.dumps(result, indent=2))
+            _print_json(result)
 
             # if the result was not a success, return with -1
             if result.get("heos", {}).get("result", "") != "success":
                 sys.exit(-1)
         else:
-            logging.info("Nothing to do.")
+            _log.info("Nothing to do.")
 
     finally:
         # we may want to delete the lockfile created earlier, no matter how things were going previously.
@@ -14,9 +14,11 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import select
 import socket
 import http.client
 import io
+import time
 
 class SSDPResponse(object):
     class _FakeSocket(io.BytesIO):
@@ -34,27 +36,40 @@ class SSDPResponse(object):
     def __repr__(self):
         return "<SSDPResponse({location}, {st}, {usn})>".format(**self.__dict__)
 
-def discover(service, timeout=5, retries=1, mx=3):
+def iter_discover(service, timeout=1.5, mx=1):
+    """Send a single M-SEARCH for `service` and yield the responses as they
+    arrive, for at most `timeout` seconds. Each location is yielded once."""
     group = ("239.255.255.250", 1900)
     message = "\r\n".join([
         'M-SEARCH * HTTP/1.1',
         'HOST: {0}:{1}',
         'MAN: "ssdp:discover"',
         'ST: {st}','MX: {mx}','',''])
-    socket.setdefaulttimeout(timeout)
-    responses = {}
-    for _ in range(retries):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP) as sock:
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
         message_bytes = message.format(*group, st=service, mx=mx).encode('utf-8')
         sock.sendto(message_bytes, group)
+        deadline = time.monotonic() + timeout
+        seen = set()
         while True:
-            try:
-                response = SSDPResponse(sock.recv(1024))
-                responses[response.location] = response
-            except socket.timeout:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            readable, _, _ = select.select([sock], [], [], remaining)
+            if not readable:
                 break
+            response = SSDPResponse(sock.recv(1024))
+            if response.location in seen:
+                continue
+            seen.add(response.location)
+            yield response
+
+def discover(service, timeout=5, retries=1, mx=3):
+    responses = {}
+    for _ in range(retries):
+        for response in iter_discover(service, timeout, mx):
+            responses[response.location] = response
     return list(responses.values())
 
 # Example for upnp service:
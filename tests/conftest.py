@@ -0,0 +1,128 @@
+import contextlib
+import json
+import socket
+import threading
+
+import pytest
+
+import heospy
+
+
+PLAYERS = [{"name": "Living Room", "pid": 111}, {"name": "Küche", "pid": 222}]
+GROUPS = [{"name": "All", "gid": 111}]
+
+
+def _reply(command, message="", result="success", payload=None):
+    response = {"heos": {"command": command, "result": result, "message": message}}
+    if payload is not None:
+        response["payload"] = payload
+    return (json.dumps(response) + "\r\n").encode("utf-8")
+
+
+class FakeHeos(object):
+    """A HEOS CLI on localhost that answers a few commands.
+
+    All requests are recorded in `requests`. The responses are sent in small
+    pieces, like a slow network would do. The response to a command in `hold`
+    is only sent after the response to the next command. Browse commands fail
+    unless a user is signed in. `stop` and `start` switch the player off and
+    on again.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.hold = set()
+        self.signed_in = True
+        self.port = 0
+        self._connections = []
+        self.start()
+
+    def start(self):
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(("127.0.0.1", self.port))
+        self._server.listen()
+        self.port = self._server.getsockname()[1]
+        threading.Thread(target=self._accept, args=(self._server,), daemon=True).start()
+
+    def stop(self):
+        # wake up the thread in accept(), closing alone doesn't
+        for conn in [self._server] + self._connections:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            conn.close()
+        del self._connections[:]
+
+    def _accept(self, server):
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            self._connections.append(conn)
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _respond(self, command, query):
+        if command == "player/get_players":
+            return _reply(command, payload=PLAYERS)
+        if command == "group/get_groups" or command == "player/get_groups":
+            return _reply(command, payload=GROUPS)
+        if command == "system/check_account":
+            return _reply(command, "signed_in&un=me@example.com" if self.signed_in else "signed_out")
+        if command == "system/sign_in":
+            self.signed_in = True
+            return _reply(command, "command under process") + _reply(command, "signed_in&" + query)
+        if command.startswith("browse/") and not self.signed_in:
+            return _reply(command, "eid=8&text=User not logged in", result="fail")
+        if command == "test/fail":
+            return _reply(command, "eid=2&text=Invalid command", result="fail")
+        return _reply(command, query)
+
+    def _handle(self, conn):
+        held = b""
+        with conn, conn.makefile("rb") as rfile, contextlib.suppress(OSError):
+            for line in rfile:
+                line = line.decode("utf-8").strip()
+                self.requests.append(line)
+                command, _, query = line[len("heos://"):].partition("?")
+                response = self._respond(command, query)
+                if command in self.hold:
+                    held += response
+                    continue
+                response, held = response + held, b""
+                for i in range(0, len(response), 7):
+                    conn.sendall(response[i:i + 7])
+
+    def close(self):
+        self.stop()
+
+
+@pytest.fixture
+def heos_server(monkeypatch):
+    server = FakeHeos()
+    monkeypatch.setattr(heospy, "HEOS_PORT", server.port)
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(json.dumps({
+        "player_name": "Living Room",
+        "user": "me@example.com",
+        "pw": "secret",
+        "host": "127.0.0.1",
+        "pid": 111,
+        "players": {"Living Room": 111, "Küche": 222},
+        "groups": {"All": 111},
+    }, indent=2))
+    config_file.chmod(0o600)
+    return str(config_file)
+
+
+@pytest.fixture
+def player(heos_server, config_file):
+    return heospy.HeosPlayer(config_file=config_file)
@@ -0,0 +1,47 @@
+import json
+import sys
+
+import pytest
+
+import heospy
+
+
+@pytest.fixture
+def run_main(heos_server, config_file, tmp_path, monkeypatch, capsys):
+    # don't forward the commands to a heos_player daemon of the user
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+
+    def run(*args):
+        monkeypatch.setattr(sys, "argv", ["heos_player", "-c", config_file, "-l", "ERROR"] + list(args))
+        try:
+            heospy.main()
+            code = 0
+        except SystemExit as e:
+            code = e.code
+        return code, capsys.readouterr().out
+    return run
+
+
+def test_infile(run_main, tmp_path):
+    infile = tmp_path / "commands.txt"
+    infile.write_text("# a comment\nplayer/set_volume level=10\n\nwait 0\nplayer/get_volume\n")
+    code, out = run_main("-i", str(infile))
+    assert code == 0
+    results = json.loads(out)
+    assert [r.get("heos", {}).get("command") for r in results] == ["player/set_volume", None, "player/get_volume"]
+    assert results[1] == {"heospy": {"sleep": "successful for 0 secs"}}
+
+
+def test_infile_fail(run_main, tmp_path):
+    infile = tmp_path / "commands.txt"
+    infile.write_text("test/fail --ignore-fail\ntest/fail\nplayer/get_volume\n")
+    code, out = run_main("-i", str(infile))
+    assert code == -1
+    # the output is valid JSON up to the failed command
+    assert [r["heos"]["command"] for r in json.loads(out)] == ["test/fail", "test/fail"]
+
+
+def test_cmd(run_main):
+    code, out = run_main("player/set_volume", "-p", "level=10")
+    assert code == 0
+    assert json.loads(out)["heos_message_parsed"] == {"pid": "111", "level": "10"}
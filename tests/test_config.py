@@ -0,0 +1,52 @@
+import json
+import os
+import stat
+
+import heospy
+
+
+def test_save_config_skipped_when_unchanged(player, config_file):
+    inode = os.stat(config_file).st_ino
+    player._save_config()
+    assert os.stat(config_file).st_ino == inode
+
+
+def test_save_config_written_when_changed(player, config_file):
+    player._config["pid"] = 222
+    player._save_config()
+    with open(config_file) as f:
+        assert json.load(f)["pid"] == 222
+    # the config contains the password
+    assert stat.S_IMODE(os.stat(config_file).st_mode) == 0o600
+    assert os.listdir(os.path.dirname(config_file)) == ["config.json"]
+
+
+def test_save_config_keeps_symlink(heos_server, config_file, tmp_path):
+    link = tmp_path / "link.json"
+    link.symlink_to(config_file)
+    player = heospy.HeosPlayer(config_file=str(link))
+    player._config["pid"] = 222
+    player._save_config()
+    assert link.is_symlink()
+    with open(config_file) as f:
+        assert json.load(f)["pid"] == 222
+
+
+def test_sign_in_is_cached(heos_server, config_file):
+    heospy.HeosPlayer(config_file=config_file)
+    assert "heos://system/check_account" in heos_server.requests
+    inode = os.stat(config_file).st_ino
+    del heos_server.requests[:]
+    heospy.HeosPlayer(config_file=config_file)
+    assert "heos://system/check_account" not in heos_server.requests
+    # the config is not rewritten for the cached sign in
+    assert os.stat(config_file).st_ino == inode
+
+
+def test_sign_in_again_when_signed_out(heos_server, config_file):
+    heospy.HeosPlayer(config_file=config_file)
+    heos_server.signed_in = False
+    player = heospy.HeosPlayer(config_file=config_file)
+    result = player.cmd("browse/get_music_sources", {})
+    assert result["heos"]["result"] == "success"
+    assert heos_server.signed_in
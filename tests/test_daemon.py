@@ -0,0 +1,67 @@
+import os
+import socket
+import threading
+
+import pytest
+
+import heospy
+
+
+@pytest.fixture
+def daemon(player, tmp_path, monkeypatch):
+    # serve on $XDG_RUNTIME_DIR/heospy.sock in our temporary directory
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    threading.Thread(target=heospy.serve, args=(player,), daemon=True).start()
+    for _ in range(100):
+        if (tmp_path / "heospy.sock").exists():
+            break
+        threading.Event().wait(0.01)
+    return player
+
+
+def test_daemon_cmd(daemon, config_file):
+    client = heospy.HeosDaemonClient(config_file)
+    result = client.cmd("player/get_volume", {})
+    assert result["heos_message_parsed"] == {"pid": "111"}
+    assert [r["heos"]["command"] for r in client.status()["player"]][0] == "player/get_play_state"
+
+
+def test_daemon_other_config(daemon, tmp_path):
+    other_config = tmp_path / "other.json"
+    other_config.write_text("{}")
+    with pytest.raises(heospy.HeosPlayerConfigException):
+        heospy.HeosDaemonClient(str(other_config))
+
+
+def test_daemon_reconnects(daemon, heos_server, config_file):
+    client = heospy.HeosDaemonClient(config_file)
+    heos_server.stop()
+    # the HEOS player is off, reconnecting fails
+    for _ in range(2):
+        with pytest.raises(heospy.HeosPlayerGeneralException):
+            client.cmd("player/get_volume", {})
+    heos_server.start()
+    assert client.cmd("player/get_volume", {})["heos"]["result"] == "success"
+
+
+@pytest.fixture
+def foreign_socket(tmp_path, monkeypatch):
+    """A socket at the daemon address that seems to belong to another user."""
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(str(tmp_path / "heospy.sock"))
+    server.listen()
+    uid = os.getuid()
+    monkeypatch.setattr(os, "getuid", lambda: uid + 1)
+    yield server
+    server.close()
+
+
+def test_client_rejects_foreign_socket(foreign_socket, config_file):
+    with pytest.raises(PermissionError):
+        heospy.HeosDaemonClient(config_file)
+
+
+def test_serve_rejects_foreign_socket(foreign_socket, player):
+    with pytest.raises(heospy.HeosPlayerGeneralException, match="already serving"):
+        heospy.serve(player)
@@ -0,0 +1,65 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import heospy
+
+
+class FakeResponse(object):
+    st = heospy.HeosPlayer.URN_SCHEMA
+
+    def __init__(self, host):
+        self.location = "http://{}:60006/upnp/desc/aios_device/aios_device.xml".format(host)
+
+
+@pytest.fixture
+def searches(heos_server, monkeypatch):
+    """Answer each SSDP search with the hosts in the returned list, and count
+    the searches."""
+    fake = SimpleNamespace(hosts=["127.0.0.1"], count=0)
+
+    def iter_discover(service, timeout, mx):
+        fake.count += 1
+        for host in list(fake.hosts):
+            yield FakeResponse(host)
+        # like a real search, wait for more responses until the timeout
+        time.sleep(timeout)
+
+    monkeypatch.setattr(heospy.ssdp, "iter_discover", iter_discover)
+    monkeypatch.setattr(heospy, "_ssdp_cache", {})
+    return fake
+
+
+def test_discovery_stops_at_match(searches, config_file):
+    start = time.monotonic()
+    player = heospy.HeosPlayer(rediscover=True, config_file=config_file)
+    assert time.monotonic() - start < heospy.SSDP_TIMEOUT
+    assert (player.host, player.pid) == ("127.0.0.1", 111)
+
+
+def test_discovery_skips_unreachable_device(searches, config_file):
+    searches.hosts.insert(0, "127.0.0.2")
+    player = heospy.HeosPlayer(rediscover=True, config_file=config_file)
+    assert (player.host, player.pid) == ("127.0.0.1", 111)
+
+
+def test_discovery_fails_without_device(searches, config_file):
+    del searches.hosts[:]
+    with pytest.raises(heospy.HeosPlayerGeneralException):
+        heospy.HeosPlayer(rediscover=True, config_file=config_file)
+
+
+def test_repeated_discovery_uses_cache(searches, config_file):
+    heospy.HeosPlayer(rediscover=True, config_file=config_file)
+    start = time.monotonic()
+    heospy.HeosPlayer(rediscover=True, config_file=config_file)
+    assert time.monotonic() - start < heospy.SSDP_TIMEOUT
+    assert searches.count == 1
+
+
+def test_stale_cache_searches_again(searches, config_file):
+    heospy._ssdp_cache["stale"] = (time.monotonic(), FakeResponse("127.0.0.2"))
+    player = heospy.HeosPlayer(rediscover=True, config_file=config_file)
+    assert (player.host, player.pid) == ("127.0.0.1", 111)
+    assert searches.count == 1
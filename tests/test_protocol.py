@@ -0,0 +1,80 @@
+import pytest
+
+import heospy
+from conftest import PLAYERS
+
+
+def test_telnet_request(player):
+    # the fake HEOS CLI sends each response in pieces of 7 bytes
+    response = player.telnet_request("player/get_players")
+    assert response["payload"] == PLAYERS
+    assert player.telnet_request("system/heart_beat")["heos"]["command"] == "system/heart_beat"
+
+
+def test_heos_quote():
+    # only the characters that HEOS reserves are escaped
+    assert heospy._heos_quote("a&b=c%d") == "a%26b%3Dc%25d"
+    assert heospy._heos_quote("http://radio.example/stream?x") == "http://radio.example/stream?x"
+    assert heospy._heos_quote(b"Living Room") == "Living Room"
+
+
+@pytest.mark.parametrize("cmd, args, request_line", [
+    ("player/set_volume", {"level": "10"}, "heos://player/set_volume?pid=111&level=10"),
+    ("player/get_volume", {"pid": "222"}, "heos://player/get_volume?dummy=1&pid=222"),
+    ("player/play_stream", {"url": "http://a/?b=c&d"},
+     "heos://player/play_stream?pid=111&url=http://a/?b%3Dc%26d"),
+    ("group/set_group", {"pname": "Living Room,Küche"}, "heos://group/set_group?gid=111&pid=111,222"),
+    ("group/get_group_info", {"gname": "All"}, "heos://group/get_group_info?dummy=1&gid=111"),
+])
+def test_cmd_query(heos_server, player, cmd, args, request_line):
+    player.cmd(cmd, args)
+    assert heos_server.requests[-1] == request_line
+
+
+def test_cmd_unknown_name(player):
+    with pytest.raises(heospy.HeosPlayerGeneralException):
+        player.cmd("player/get_volume", {"pname": "Bathroom"})
+
+
+@pytest.mark.parametrize("cmd, request_line", [
+    ("group/get_volume", "heos://group/get_volume?gid=111"),
+    ("system/heart_beat", "heos://system/heart_beat?dummy=1"),
+    ("browse/play_stream", "heos://browse/play_stream?pid=111"),
+    ("browse/get_music_sources", "heos://browse/get_music_sources?dummy=1"),
+])
+def test_cmd_default_id(heos_server, player, cmd, request_line):
+    player.cmd(cmd, {})
+    assert heos_server.requests[-1] == request_line
+
+
+def test_parse_message(player):
+    response = {"heos": {"command": "system/check_account", "message": "signed_in&un=me@example.com&text=a=b"}}
+    parsed = player._parse_message(response)["heos_message_parsed"]
+    assert parsed == {"signed_in": True, "un": "me@example.com", "text": "a=b"}
+    assert "heos_message_parsed" not in player._parse_message({"heos": {"message": ""}})
+
+
+def test_command_under_process(player):
+    response = player.telnet_request("system/sign_in?un=me@example.com&pw=secret")
+    assert response["heos_message_parsed"]["signed_in"] is True
+
+
+def test_telnet_request_many_order(heos_server, player):
+    # the HEOS player answers get_volume after get_mute
+    heos_server.hold.add("player/get_volume")
+    responses = player.telnet_request_many(["player/get_volume?pid=111", "player/get_mute?pid=111",
+                                            "system/heart_beat"])
+    assert [r["heos"]["command"] for r in responses] == ["player/get_volume", "player/get_mute",
+                                                          "system/heart_beat"]
+
+
+def test_status_order(heos_server, player):
+    heos_server.hold.add("system/heart_beat")
+    heos_server.hold.add("player/get_volume")
+    status = player.status()
+    assert [r["heos"]["command"] for r in status["general"]] == [
+        "system/heart_beat", "system/check_account", "browse/get_music_sources",
+        "player/get_players", "group/get_groups"]
+    assert [r["heos"]["command"] for r in status["player"]] == [
+        "player/get_play_state", "player/get_player_info", "player/get_volume",
+        "player/get_mute", "player/get_now_playing_media"]